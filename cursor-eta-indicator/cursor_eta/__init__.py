@@ -9,10 +9,18 @@ __author__ = "Cursor ETA Contributors"
 __license__ = "MIT"
 
 from .agent_with_eta import AgentETATracker, AgentWrapper
+from .metrics import REGISTRY, MetricsRegistry, NullTrackerMetrics, TrackerMetrics, start_http_server
+from .remote import TrackerProxy
 
 __all__ = [
     "AgentETATracker",
     "AgentWrapper",
+    "MetricsRegistry",
+    "NullTrackerMetrics",
+    "TrackerMetrics",
+    "TrackerProxy",
+    "REGISTRY",
+    "start_http_server",
     "__version__",
 ]
 
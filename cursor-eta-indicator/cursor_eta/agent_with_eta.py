@@ -8,30 +8,81 @@ import sys
 import time
 import json
 import threading
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
+try:
+    from .metrics import TRACKER_METRICS, TrackerMetrics
+    from .remote import DEFAULT_FLUSH_INTERVAL, TrackerHub, TrackerProxy
+except ImportError:
+    from metrics import TRACKER_METRICS, TrackerMetrics
+    from remote import DEFAULT_FLUSH_INTERVAL, TrackerHub, TrackerProxy
+
+
+def format_time(seconds: float) -> str:
+    """Format seconds into human readable time."""
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    elif seconds < 3600:
+        return f"{int(seconds/60)}m {int(seconds%60)}s"
+    else:
+        hours = int(seconds / 3600)
+        minutes = int((seconds % 3600) / 60)
+        return f"{hours}h {minutes}m"
+
+
+def make_progress_bar(percent: int, width: int = 20) -> str:
+    """Create a simple ASCII progress bar."""
+    filled = int(width * percent / 100)
+    bar = "█" * filled + "░" * (width - filled)
+    return f"[{bar}] {percent}%"
+
 
 class AgentETATracker:
     """Tracks progress and ETA for agent operations."""
     
-    def __init__(self, total_steps: int = 10, expected_duration: float = 30.0):
+    def __init__(self, total_steps: int = 10, expected_duration: float = 30.0,
+                 model: str = "", metrics: Optional[TrackerMetrics] = None):
         self.total_steps = total_steps
         self.current_step = 0
         self.expected_duration = expected_duration
         self.start_time = None
-        self.tokens_used = 0
+        self.local_tokens = 0
+        self.worker_tokens = 0
         self.tokens_expected = 0
         self.is_running = False
         self.update_thread = None
         self.step_descriptions = {}
+        self.model = model
+        self.metrics = metrics if metrics is not None else TRACKER_METRICS
+        self._instrumented = self.metrics.enabled
+        self._step_started = None
+        # Plain counters drained by the metrics registry; no locks on the hot path
+        self.emit_count = 0
+        self.suppressed_count = 0
+        self.metrics_flushed = (0, 0)  # (emits, suppressed) already drained
+        self.pending_steps = deque()
+        self.eta_checkpoints = []
+        self.hub = None
+        # Worker proxies step the tracker from the hub thread too
+        self._step_lock = threading.Lock()
         
     def start(self, tokens_expected: int = 0):
         """Start tracking with optional expected token count."""
+        if not self.is_running:
+            # A restarted tracker reports only this run's emits
+            self.emit_count = 0
+            self.suppressed_count = 0
+            self.metrics_flushed = (0, 0)
         self.start_time = time.time()
         self.tokens_expected = tokens_expected
         self.is_running = True
         self.current_step = 1
+        self._step_started = self.start_time
+        # No prediction at elapsed 0 - the estimator has nothing to go on yet
+        self.eta_checkpoints = []
+        self.metrics.tracker_started(self)
         
         # Start update thread for continuous updates
         self.update_thread = threading.Thread(target=self._update_loop)
@@ -40,31 +91,70 @@ class AgentETATracker:
         
     def step(self, step_num: Optional[int] = None, description: str = ""):
         """Update current step with optional description."""
-        if step_num is not None:
-            self.current_step = step_num
-        else:
-            self.current_step += 1
-            
-        if description:
-            self.step_descriptions[self.current_step] = description
+        with self._step_lock:
+            previous_step = self.current_step
+            if step_num is not None:
+                self.current_step = step_num
+            else:
+                self.current_step += 1
+                
+            if description:
+                self.step_descriptions[self.current_step] = description
+                
+            if self._instrumented and self.is_running and self.current_step != previous_step:
+                now = time.time()
+                self.pending_steps.append((previous_step, now - self._step_started))
+                self.eta_checkpoints.append((self.current_step, now - self.start_time))
+                self._step_started = now
             
+    @property
+    def tokens_used(self) -> int:
+        """Tokens reported in this process plus those reported by worker proxies."""
+        return self.local_tokens + self.worker_tokens
+        
+    @tokens_used.setter
+    def tokens_used(self, tokens: int):
+        self.local_tokens = tokens
+        
     def update_tokens(self, tokens: int):
         """Update token usage."""
-        self.tokens_used = tokens
+        self.local_tokens = tokens
+        
+    def proxy(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL) -> Optional[TrackerProxy]:
+        """Get a picklable proxy for worker processes, or None when not running."""
+        if not self.is_running:
+            return None
+        if self.hub is None:
+            self.hub = TrackerHub(self)
+        return self.hub.proxy(flush_interval)
         
     def stop(self):
         """Stop tracking."""
+        was_running = self.is_running
+        if self.hub:
+            # Apply the workers' last updates while they still count as part of the run
+            self.hub.close()
+            self.hub = None
         self.is_running = False
         if self.update_thread:
             self.update_thread.join(timeout=0.5)
+        if was_running:
+            now = time.time()
+            if self._instrumented:
+                with self._step_lock:
+                    self.pending_steps.append((self.current_step, now - self._step_started))
+            self.metrics.tracker_stopped(self, now - self.start_time)
             
     def get_eta(self) -> float:
         """Calculate ETA in seconds."""
         if not self.start_time:
             return self.expected_duration
             
-        elapsed = time.time() - self.start_time
-        progress = self.current_step / self.total_steps
+        return self.eta_at(time.time() - self.start_time, self.current_step)
+        
+    def eta_at(self, elapsed: float, step: int) -> float:
+        """ETA in seconds for a given elapsed time and step."""
+        progress = step / self.total_steps
         
         if progress > 0:
             # Estimate based on current progress
@@ -106,37 +196,37 @@ class AgentETATracker:
         progress_bar = self._make_progress_bar(status["progress_percent"])
         console_line = f"\rETA: {eta_str} | Step {status['current_step']}/{status['total_steps']} {progress_bar}"
         
-        # Write to stderr for console visibility
-        sys.stderr.write(console_line)
-        sys.stderr.flush()
-        
         # Machine readable for VS Code extension (stdout)
         machine_line = f"STATUS|{json.dumps(status)}"
-        print(machine_line, flush=True)
+        
+        try:
+            # Write to stderr for console visibility
+            sys.stderr.write(console_line)
+            sys.stderr.flush()
+            print(machine_line, flush=True)
+        except (OSError, ValueError):
+            # Closed or broken pipe - keep tracking, just count the drop
+            if self._instrumented:
+                self.suppressed_count += 1
+            return
+        if self._instrumented:
+            self.emit_count += 1
         
     def _format_time(self, seconds: float) -> str:
         """Format seconds into human readable time."""
-        if seconds < 60:
-            return f"{int(seconds)}s"
-        elif seconds < 3600:
-            return f"{int(seconds/60)}m {int(seconds%60)}s"
-        else:
-            hours = int(seconds / 3600)
-            minutes = int((seconds % 3600) / 60)
-            return f"{hours}h {minutes}m"
+        return format_time(seconds)
             
     def _make_progress_bar(self, percent: int, width: int = 20) -> str:
         """Create a simple ASCII progress bar."""
-        filled = int(width * percent / 100)
-        bar = "█" * filled + "░" * (width - filled)
-        return f"[{bar}] {percent}%"
+        return make_progress_bar(percent, width)
 
 
 class AgentWrapper:
     """Wrapper for agent execution with ETA tracking."""
     
-    def __init__(self):
+    def __init__(self, metrics: Optional[TrackerMetrics] = None):
         self.tracker = None
+        self.metrics = metrics
         
     def execute_with_eta(self, agent_func, *args, **kwargs):
         """Execute an agent function with ETA tracking."""
@@ -144,16 +234,21 @@ class AgentWrapper:
         total_steps = kwargs.pop('eta_total_steps', 10)
         expected_duration = kwargs.pop('eta_expected_duration', 30.0)
         expected_tokens = kwargs.pop('eta_expected_tokens', 0)
+        model = kwargs.pop('eta_model', "")
         
         # Initialize tracker
-        self.tracker = AgentETATracker(total_steps, expected_duration)
+        self.tracker = AgentETATracker(total_steps, expected_duration,
+                                       model=model, metrics=self.metrics)
         self.tracker.start(expected_tokens)
         
+        outcome = "error"
         try:
             # Execute the actual agent function
             result = agent_func(*args, **kwargs)
+            outcome = "success"
             return result
         finally:
+            self.tracker.metrics.run_finished(outcome)
             # Stop tracking
             self.tracker.stop()
             # Clear the console line
@@ -171,6 +266,12 @@ class AgentWrapper:
         """Update token usage."""
         if self.tracker:
             self.tracker.update_tokens(tokens)
+            
+    def proxy(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL) -> Optional[TrackerProxy]:
+        """Get a picklable proxy for the current tracker, for worker processes."""
+        if self.tracker:
+            return self.tracker.proxy(flush_interval)
+        return None
 
 
 # Example usage and testing
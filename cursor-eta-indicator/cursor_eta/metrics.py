@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+In-process metrics for tracker internals.
+Counters, gauges and fixed-bucket histograms with a Prometheus text exposition
+endpoint. No third-party dependencies - everything is stdlib.
+"""
+
+import bisect
+import math
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+RATIO_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+TPS_BUCKETS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+
+# Step descriptions are free-form; past this many, new ones are folded into "other"
+MAX_STEP_LABELS = 50
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render a label set as {a="x",b="y"}."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base for all metric families. Holds one child per label set."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values: str):
+        """Return the child for a label set, creating it on first use."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels()")
+        return self._children[()]
+
+    def collect(self) -> List[str]:
+        """Render this family in text exposition format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child) -> Iterable[str]:
+        labels = _format_labels(self.labelnames, key)
+        return [f"{self.name}{labels} {_format_value(child.get())}"]
+
+
+class _Value:
+    """A single float guarded by a lock. Uncontended acquire is ~50ns."""
+
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def get(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        self._unlabelled().inc(amount)
+
+    def get(self) -> float:
+        return self._unlabelled().get()
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled().dec(amount)
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+    def get(self) -> float:
+        return self._unlabelled().get()
+
+
+class _HistogramValue:
+    """Fixed-bucket histogram state. Buckets are stored non-cumulatively."""
+
+    __slots__ = ("_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def observe_many(self, values: Sequence[float]):
+        """Observe a batch of values under one lock acquisition."""
+        indexes = [bisect.bisect_left(self._bounds, value) for value in values]
+        with self._lock:
+            counts = self._counts
+            for index in indexes:
+                counts[index] += 1
+            self._sum += sum(values)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+    def get(self) -> int:
+        return sum(self.snapshot()[0])
+
+
+class Histogram(_Metric):
+    """Histogram with fixed, upper-inclusive bucket bounds."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        if not bounds:
+            raise ValueError("Histogram needs at least one finite bucket")
+        self.buckets = bounds
+        self._le = [_format_value(b) for b in bounds + (math.inf,)]
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def get(self) -> int:
+        return self._unlabelled().get()
+
+    def _render_child(self, key: Tuple[str, ...], child) -> Iterable[str]:
+        counts, total = child.snapshot()
+        labels = _format_labels(self.labelnames, key)
+        # Splice le into the existing label set rather than re-rendering it per bucket
+        prefix = f"{self.name}_bucket{{{labels[1:-1]}," if labels else f"{self.name}_bucket{{"
+        lines = []
+        cumulative = 0
+        for le, count in zip(self._le, counts):
+            cumulative += count
+            lines.append(f'{prefix}le="{le}"}} {cumulative}')
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families, rendered together for scraping."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collect_hooks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def add_collect_hook(self, hook: Callable[[], None]):
+        """Register a callable run before every exposition to refresh values."""
+        self._collect_hooks.append(hook)
+
+    def _get_or_create(self, cls, name: str, documentation: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames=labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames=labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation,
+                                   labelnames=labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def exposition(self) -> str:
+        """Render every registered metric in Prometheus text format."""
+        for hook in self._collect_hooks:
+            hook()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+class TrackerMetrics:
+    """
+    The metric set fed by AgentETATracker and AgentWrapper hooks.
+
+    Per-emit and per-step work stays on the tracker as plain attribute updates
+    (emit_count, suppressed_count, pending_steps, eta_checkpoints). Live
+    trackers are drained into the registry when it is scraped and when they
+    stop, so the hot path never takes a lock.
+    """
+
+    enabled = True
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self.active_trackers = registry.gauge(
+            "cursor_eta_active_trackers", "Trackers currently running.")
+        self.runs = registry.counter(
+            "cursor_eta_runs_total", "Tracked runs by outcome.", ["outcome"])
+        self.emits = registry.counter(
+            "cursor_eta_emits_total", "STATUS updates written.")
+        self.emits_suppressed = registry.counter(
+            "cursor_eta_emits_suppressed_total", "STATUS updates dropped because the output stream failed.")
+        self.run_duration = registry.histogram(
+            "cursor_eta_run_duration_seconds", "Wall-clock duration of tracked runs.")
+        self.step_duration = registry.histogram(
+            "cursor_eta_step_duration_seconds",
+            f"Time spent in each step, by step description (first {MAX_STEP_LABELS}, then \"other\").",
+            ["step"])
+        self.estimate_error = registry.histogram(
+            "cursor_eta_estimate_error_ratio",
+            "Relative error of the ETA predicted at each step change (elapsed + ETA) against the actual run duration.",
+            buckets=RATIO_BUCKETS)
+        self.tokens = registry.counter(
+            "cursor_eta_tokens_total", "Tokens reported by tracked runs.", ["model"])
+        self.tokens_per_second = registry.histogram(
+            "cursor_eta_tokens_per_second", "Token throughput of tracked runs.", ["model"],
+            buckets=TPS_BUCKETS)
+        # Weak so a tracker dropped without stop() doesn't stay "active" forever
+        self._live = weakref.WeakSet()
+        self._step_labels = set()
+        self._lock = threading.Lock()
+        self._estimate_error = self.estimate_error._unlabelled()
+        registry.add_collect_hook(self.sync)
+
+    def tracker_started(self, tracker):
+        with self._lock:
+            if tracker in self._live:
+                return
+            self._live.add(tracker)
+            self.active_trackers.set(len(self._live))
+
+    def tracker_stopped(self, tracker, elapsed: float):
+        with self._lock:
+            if tracker not in self._live:
+                return
+            self._drain(tracker)
+            self._live.discard(tracker)
+            self.active_trackers.set(len(self._live))
+        self.run_duration.observe(elapsed)
+        if elapsed > 0:
+            eta_at = tracker.eta_at
+            self._estimate_error.observe_many([
+                abs(at + eta_at(at, step) - elapsed) / elapsed
+                for step, at in tracker.eta_checkpoints if at > 0
+            ])
+        if tracker.tokens_used:
+            model = tracker.model or "unknown"
+            self.tokens.labels(model).inc(tracker.tokens_used)
+            if elapsed > 0:
+                self.tokens_per_second.labels(model).observe(tracker.tokens_used / elapsed)
+
+    def run_finished(self, outcome: str):
+        self.runs.labels(outcome).inc()
+
+    def sync(self):
+        """Pull pending counts from every live tracker into the registry."""
+        with self._lock:
+            for tracker in list(self._live):
+                self._drain(tracker)
+            self.active_trackers.set(len(self._live))
+
+    def _drain(self, tracker):
+        # Counts only grow within a run, so flush the delta since the last drain
+        emits, suppressed = tracker.emit_count, tracker.suppressed_count
+        flushed_emits, flushed_suppressed = tracker.metrics_flushed
+        if emits > flushed_emits:
+            self.emits.inc(emits - flushed_emits)
+        if suppressed > flushed_suppressed:
+            self.emits_suppressed.inc(suppressed - flushed_suppressed)
+        tracker.metrics_flushed = (emits, suppressed)
+
+        # deque.append/popleft are atomic, so steps recorded mid-drain are kept for next time
+        pending = tracker.pending_steps
+        descriptions = tracker.step_descriptions
+        by_label: Dict[str, List[float]] = {}
+        while pending:
+            step_num, seconds = pending.popleft()
+            label = self._step_label(descriptions.get(step_num) or "unlabeled")
+            by_label.setdefault(label, []).append(seconds)
+        for label, values in by_label.items():
+            self.step_duration.labels(label).observe_many(values)
+
+    def _step_label(self, description: str) -> str:
+        if description not in self._step_labels:
+            if len(self._step_labels) >= MAX_STEP_LABELS:
+                return "other"
+            self._step_labels.add(description)
+        return description
+
+
+class NullTrackerMetrics(TrackerMetrics):
+    """Turns tracker instrumentation off, including the hot-path bookkeeping."""
+
+    enabled = False
+
+    def __init__(self):
+        pass
+
+    def tracker_started(self, tracker):
+        pass
+
+    def tracker_stopped(self, tracker, elapsed: float):
+        pass
+
+    def run_finished(self, outcome: str):
+        pass
+
+    def sync(self):
+        pass
+
+
+REGISTRY = MetricsRegistry()
+TRACKER_METRICS = TrackerMetrics(REGISTRY)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the registry at /metrics."""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep stderr free for the progress line
+        pass
+
+
+def start_http_server(port: int = 9464, addr: str = "127.0.0.1",
+                      registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Serve metrics from a daemon thread. Call .shutdown() on the result to stop."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or REGISTRY})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Headless monitor for STATUS| streams.
+Tails agent logs or pipes and shows a live multi-run dashboard, or scans
+historical logs in one pass and prints per-run timing summaries.
+
+Usage:
+    python -m cursor_eta.monitor build1.log build2.log   # live dashboard
+    some_agent | python -m cursor_eta.monitor -           # from a pipe
+    python -m cursor_eta.monitor --summary agent.log      # one-pass summary
+"""
+
+import argparse
+import json
+import mmap
+import os
+import stat
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .agent_with_eta import format_time, make_progress_bar
+except ImportError:
+    from agent_with_eta import format_time, make_progress_bar
+
+
+MARKER = b"STATUS|"
+COMPLETE = b"COMPLETE"
+CHUNK_SIZE = 1 << 20  # Large reads; STATUS lines are found with bytes.find, not per-line parsing
+MIN_REFRESH = 0.1
+# elapsed_seconds is rounded and tailing lags the writer, so live start times are approximate
+START_TOLERANCE = 2.0
+# Trackers emit every 500ms; a live run this quiet has stopped without COMPLETE
+LOST_AFTER = 10.0
+
+
+def iter_payloads(buf, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int]]:
+    """
+    Yield (payload, line_end) for each complete STATUS| line in buf[start:end].
+
+    Works on bytes and mmap objects alike. Lines without the marker are never
+    split or decoded - the search jumps straight from one marker to the next.
+    The marker may follow other text on the same line (e.g. a \\r progress line
+    when stderr and stdout share a log).
+    """
+    if end is None:
+        end = len(buf)
+    find = buf.find
+    pos = find(MARKER, start, end)
+    while pos != -1:
+        newline = find(b"\n", pos, end)
+        if newline == -1:
+            return
+        yield buf[pos + len(MARKER):newline].rstrip(b"\r"), newline + 1
+        pos = find(MARKER, newline + 1, end)
+
+
+class RunStats:
+    """Aggregated state for one tracked run within one source."""
+
+    def __init__(self, source: str, index: int, key: Tuple[Any, Any], start: Optional[float] = None):
+        self.source = source
+        self.index = index
+        # (total_steps, tokens_expected) - fixed for a tracker's whole run
+        self.key = key
+        # Wall-clock start (arrival - elapsed), known only for lines read as they were written
+        self.start = start
+        self.updates = 0
+        self.completed = False
+        self.is_live = True
+        self.last_seen = 0
+        self.last_arrival: Optional[float] = None
+        self.last: Dict[str, Any] = {}
+        # step -> [first elapsed_seconds seen, description]
+        self.steps: Dict[int, List[Any]] = {}
+
+    def update(self, status: Dict[str, Any]):
+        self.updates += 1
+        self.last = status
+        step = status.get("current_step", 0)
+        entry = self.steps.get(step)
+        if entry is None:
+            entry = self.steps[step] = [status.get("elapsed_seconds", 0), ""]
+        if status.get("current_description"):
+            entry[1] = status["current_description"]
+
+    @property
+    def elapsed(self) -> float:
+        return self.last.get("elapsed_seconds", 0)
+
+    def step_durations(self) -> List[Tuple[int, str, float]]:
+        """Time per step, at the one-second resolution of elapsed_seconds."""
+        ordered = sorted(self.steps.items(), key=lambda item: item[1][0])
+        durations = []
+        for i, (step, (started, description)) in enumerate(ordered):
+            finished = ordered[i + 1][1][0] if i + 1 < len(ordered) else self.elapsed
+            durations.append((step, description, max(0, finished - started)))
+        return durations
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "run": self.index,
+            "completed": self.completed,
+            "updates": self.updates,
+            "elapsed_seconds": self.elapsed,
+            "current_step": self.last.get("current_step", 0),
+            "total_steps": self.last.get("total_steps", 0),
+            "tokens_used": self.last.get("tokens_used", 0),
+            "steps": [
+                {"step": step, "description": description, "seconds": seconds}
+                for step, description, seconds in self.step_durations()
+            ],
+        }
+
+
+class StatusAggregator:
+    """
+    Splits STATUS| payloads from many sources into runs.
+
+    Several trackers may write to one source. Their lines are told apart by
+    total_steps and tokens_expected, and, for lines read as they are written,
+    by start time. Trackers with the same totals interleaved in an old log
+    can't be told apart and are read as one run restarting. STATUS|COMPLETE
+    names no tracker, so it completes the source's most recently updated run.
+
+    With keep_runs set, only that many finished runs are kept, oldest
+    dropped first, so a long-running follow() stays bounded.
+    """
+
+    def __init__(self, keep_runs: Optional[int] = None):
+        self.runs: List[RunStats] = []
+        self.current: Dict[str, List[RunStats]] = {}
+        self.run_counts: Dict[str, int] = {}
+        self.keep_runs = keep_runs
+        self.malformed = 0
+        self._sequence = 0
+
+    def feed(self, source: str, payload: bytes, arrival: Optional[float] = None):
+        """
+        Apply one STATUS| payload (the text after the marker).
+
+        arrival is the wall-clock time the line was read, when it was read live.
+        """
+        if payload == COMPLETE:
+            runs = self.current.get(source)
+            if runs:
+                run = max(runs, key=lambda run: run.last_seen)
+                self._retire(run)
+                run.completed = True
+            return
+        try:
+            status = json.loads(payload.decode("utf-8", "replace"))
+        except ValueError:
+            self.malformed += 1
+            return
+        if not isinstance(status, dict):
+            self.malformed += 1
+            return
+
+        key = (status.get("total_steps"), status.get("tokens_expected"))
+        elapsed = status.get("elapsed_seconds", 0)
+        start = None if arrival is None else arrival - elapsed
+        runs = self.current.get(source)
+        run = self._match(runs, key, elapsed, start, arrival) if runs else None
+        if run is None:
+            index = self.run_counts.get(source, 0) + 1
+            self.run_counts[source] = index
+            run = RunStats(source, index, key, start)
+            self.current.setdefault(source, []).append(run)
+            self.runs.append(run)
+            self._trim()
+        elif run.start is None:
+            run.start = start
+        self._sequence += 1
+        run.last_seen = self._sequence
+        run.last_arrival = arrival
+        run.update(status)
+
+    def _match(self, runs: List[RunStats], key: Tuple[Any, Any], elapsed: float,
+               start: Optional[float], arrival: Optional[float]) -> Optional[RunStats]:
+        """Find the live run this status continues, retiring runs that have died."""
+        match = None
+        dead = []
+        for run in runs:
+            if (arrival is not None and run.last_arrival is not None
+                    and arrival - run.last_arrival > LOST_AFTER):
+                dead.append(run)
+            elif run.key != key:
+                continue
+            elif start is not None and run.start is not None:
+                if abs(start - run.start) <= START_TOLERANCE:
+                    match = run
+                    break
+            elif elapsed >= run.elapsed:
+                match = run
+                break
+            else:
+                # Elapsed time went backwards - the run died without COMPLETE
+                dead.append(run)
+        for run in dead:
+            self._retire(run)
+        return match
+
+    def _retire(self, run: RunStats):
+        run.is_live = False
+        self.current[run.source].remove(run)
+        self._trim()
+
+    def _trim(self):
+        """Drop the oldest finished runs beyond keep_runs."""
+        if self.keep_runs is None or len(self.runs) <= self.keep_runs:
+            return
+        excess = sum(not run.is_live for run in self.runs) - self.keep_runs
+        if excess <= 0:
+            return
+        kept = []
+        for run in self.runs:
+            if excess and not run.is_live:
+                excess -= 1
+            else:
+                kept.append(run)
+        self.runs = kept
+
+    def feed_buffer(self, source: str, buf, start: int = 0, end: Optional[int] = None,
+                    arrival: Optional[float] = None) -> int:
+        """Feed every complete STATUS| line in buf. Returns where parsing stopped."""
+        consumed = start
+        for payload, consumed in iter_payloads(buf, start, end):
+            self.feed(source, payload, arrival)
+        return consumed
+
+
+class StreamReader:
+    """Incremental reader for a growing file, a FIFO or stdin."""
+
+    def __init__(self, path: str, from_end: bool = False):
+        self.path = path
+        self.source = "<stdin>" if path == "-" else path
+        self.buffer = b""
+        self.closed = False
+        # Lines read before the first time we catch up are backlog, with no useful arrival time
+        self.caught_up = False
+        if path == "-":
+            self.fd = sys.stdin.fileno()
+            self.is_pipe = True
+        else:
+            self.is_pipe = stat.S_ISFIFO(os.stat(path).st_mode)
+            # Non-blocking so a FIFO without a writer doesn't hang startup
+            self.fd = os.open(path, os.O_RDONLY | (os.O_NONBLOCK if self.is_pipe else 0))
+        if self.is_pipe:
+            os.set_blocking(self.fd, False)
+        self.position = os.fstat(self.fd).st_size if from_end and not self.is_pipe else 0
+        if self.position:
+            os.lseek(self.fd, self.position, os.SEEK_SET)
+
+    def read_into(self, aggregator: StatusAggregator) -> bool:
+        """Read whatever is available and feed it. Returns whether data arrived."""
+        if self.closed:
+            return False
+        if not self.is_pipe:
+            size = os.fstat(self.fd).st_size
+            if size < self.position:
+                # Truncated or rotated in place - start over
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                self.position = 0
+                self.buffer = b""
+        got_data = False
+        arrival = time.time() if self.caught_up else None
+        while True:
+            try:
+                chunk = os.read(self.fd, CHUNK_SIZE)
+            except BlockingIOError:
+                break
+            if not chunk:
+                if self.is_pipe and self.path == "-":
+                    self.closed = True
+                break
+            got_data = True
+            self.position += len(chunk)
+            self._feed(chunk, aggregator, arrival)
+            if len(chunk) < CHUNK_SIZE:
+                break
+        self.caught_up = True
+        return got_data
+
+    def _feed(self, chunk: bytes, aggregator: StatusAggregator, arrival: Optional[float] = None):
+        buf = self.buffer + chunk if self.buffer else chunk
+        consumed = aggregator.feed_buffer(self.source, buf, arrival=arrival)
+        rest = buf[consumed:]
+        marker = rest.find(MARKER)
+        if marker != -1:
+            # Partial STATUS| line - keep it for the next read
+            self.buffer = rest[marker:]
+        else:
+            # Only a partial marker can straddle the chunk boundary
+            self.buffer = rest[-(len(MARKER) - 1):]
+
+    def close(self):
+        if self.path == "-":
+            # Don't leave the shell's stdin non-blocking
+            os.set_blocking(self.fd, True)
+        else:
+            os.close(self.fd)
+        self.closed = True
+
+
+def scan(path: str, aggregator: StatusAggregator):
+    """Read a whole log once, memory-mapping regular files."""
+    if path == "-" or not stat.S_ISREG(os.stat(path).st_mode):
+        reader = StreamReader(path)
+        os.set_blocking(reader.fd, True)
+        while True:
+            chunk = os.read(reader.fd, CHUNK_SIZE)
+            if not chunk:
+                break
+            reader._feed(chunk, aggregator)
+        reader.close()
+        if reader.buffer.startswith(MARKER):
+            aggregator.feed_buffer(reader.source, reader.buffer + b"\n")
+        return
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            consumed = aggregator.feed_buffer(path, mapped)
+            # A last line without a trailing newline is still a complete record
+            marker = mapped.find(MARKER, consumed)
+            if marker != -1:
+                aggregator.feed_buffer(path, mapped[marker:] + b"\n")
+
+
+def render_dashboard(aggregator: StatusAggregator, max_runs: int = 20) -> str:
+    """Render the most recent runs as a fixed-width table."""
+    lines = [f"{'SOURCE':<24} {'RUN':>3} {'STATE':<8} {'STEP':>7} {'PROGRESS':<32} "
+             f"{'ETA':>7} {'ELAPSED':>8} {'TOKENS':>8}  DESCRIPTION"]
+    for run in aggregator.runs[-max_runs:]:
+        status = run.last
+        state = "done" if run.completed else ("running" if run.is_live else "lost")
+        source = run.source if len(run.source) <= 24 else "…" + run.source[-23:]
+        lines.append(
+            f"{source:<24} {run.index:>3} {state:<8} "
+            f"{status.get('current_step', 0):>3}/{status.get('total_steps', 0):<3} "
+            f"{make_progress_bar(min(100, status.get('progress_percent', 0))):<32} "
+            f"{format_time(0 if run.completed else status.get('eta_seconds', 0)):>7} "
+            f"{format_time(run.elapsed):>8} "
+            f"{status.get('tokens_used', 0):>8}  {status.get('current_description', '')}"
+        )
+    if aggregator.malformed:
+        lines.append(f"\n{aggregator.malformed} malformed STATUS lines skipped")
+    return "\n".join(lines)
+
+
+def render_summary(aggregator: StatusAggregator) -> str:
+    """Render per-run timing summaries."""
+    lines = []
+    for run in aggregator.runs:
+        outcome = "completed" if run.completed else "incomplete"
+        status = run.last
+        lines.append(
+            f"{run.source} run {run.index}: {outcome}, "
+            f"{format_time(run.elapsed)}, "
+            f"step {status.get('current_step', 0)}/{status.get('total_steps', 0)}, "
+            f"{status.get('tokens_used', 0)} tokens"
+        )
+        for step, description, seconds in run.step_durations():
+            lines.append(f"  step {step:>3}  {format_time(seconds):>7}  {description}")
+    if aggregator.malformed:
+        lines.append(f"{aggregator.malformed} malformed STATUS lines skipped")
+    return "\n".join(lines)
+
+
+def follow(paths: List[str], refresh: float, from_end: bool, out=None, max_runs: int = 20):
+    """Tail every source and redraw the dashboard at most once per refresh interval."""
+    out = out or sys.stdout
+    refresh = max(MIN_REFRESH, refresh)
+    clear = "\x1b[H\x1b[2J" if out.isatty() else ""
+    # Only the dashboard's runs are needed, so don't grow with every run ever seen
+    aggregator = StatusAggregator(keep_runs=max_runs)
+    readers = [StreamReader(path, from_end=from_end) for path in paths]
+    dirty = True
+    next_draw = 0.0
+    try:
+        while any(not reader.closed for reader in readers):
+            for reader in readers:
+                dirty = reader.read_into(aggregator) or dirty
+            now = time.monotonic()
+            if dirty and now >= next_draw:
+                out.write(clear + render_dashboard(aggregator, max_runs) + "\n")
+                out.flush()
+                dirty = False
+                next_draw = now + refresh
+            time.sleep(min(refresh, 0.05))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for reader in readers:
+            if not reader.closed:
+                reader.close()
+    out.write(clear + render_dashboard(aggregator, max_runs) + "\n")
+    return aggregator
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m cursor_eta.monitor",
+        description="Monitor STATUS| lines from agent logs or pipes")
+    parser.add_argument("paths", nargs="*", default=["-"], help="Log files or FIFOs ('-' for stdin)")
+    parser.add_argument("--summary", action="store_true",
+                        help="Read each source once and print per-run timing summaries")
+    parser.add_argument("--json", action="store_true", help="With --summary, print one JSON object per run")
+    parser.add_argument("--refresh", type=float, default=1.0,
+                        help=f"Dashboard refresh interval in seconds (min {MIN_REFRESH})")
+    parser.add_argument("--from-end", action="store_true",
+                        help="Skip existing file contents and only show new updates")
+    args = parser.parse_args(argv)
+
+    if args.summary:
+        aggregator = StatusAggregator()
+        for path in args.paths:
+            scan(path, aggregator)
+        if args.json:
+            for run in aggregator.runs:
+                print(json.dumps(run.to_dict()))
+        else:
+            print(render_summary(aggregator))
+        return 0
+
+    follow(args.paths, args.refresh, args.from_end)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
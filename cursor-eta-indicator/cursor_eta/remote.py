@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Cross-process progress updates for AgentETATracker.
+Worker processes get a picklable TrackerProxy; updates are coalesced in the
+worker and sent to the parent in batches over one connection per process.
+"""
+
+import os
+import threading
+import time
+import weakref
+from multiprocessing import AuthenticationError, util
+from multiprocessing.connection import Client, Listener, wait
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_FLUSH_INTERVAL = 0.1  # Well under the tracker's 500ms emit interval
+# Pool workers release task arguments (and flush their proxies) just after
+# returning the result, so keep accepting and reading for a moment on close
+CLOSE_GRACE = 0.05
+
+
+class TrackerHub:
+    """Parent-side listener that applies batches from proxies to a tracker."""
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.authkey = os.urandom(32)
+        self.listener = Listener(authkey=self.authkey)
+        self.address = self.listener.address
+        self.connections = []
+        self.accepted = 0
+        self.is_running = True
+        self._lock = threading.Lock()
+        self._stop_reading = threading.Event()
+
+        self.accept_thread = threading.Thread(target=self._accept_loop)
+        self.accept_thread.daemon = True
+        self.accept_thread.start()
+        self.reader_thread = threading.Thread(target=self._read_loop)
+        self.reader_thread.daemon = True
+        self.reader_thread.start()
+
+    def proxy(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL) -> "TrackerProxy":
+        """Create a picklable proxy that reports into this hub."""
+        return TrackerProxy(self.address, self.authkey, flush_interval)
+
+    def close(self):
+        """Apply everything sent until workers go quiet, then disconnect."""
+        if not self.is_running:
+            return
+        # Still accepting here, so a worker connecting to send its last batch isn't refused
+        self._stop_reading.set()
+        self.reader_thread.join(timeout=5.0)
+        self.is_running = False
+        # accept() doesn't wake on close, so connect once to unblock it
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self.accept_thread.join(timeout=1.0)
+        self.listener.close()
+        with self._lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections = []
+
+    def _accept_loop(self):
+        """Accept worker connections until closed."""
+        while self.is_running:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                # Failed handshake, or the listener was closed under us
+                continue
+            if not self.is_running:
+                conn.close()
+                break
+            with self._lock:
+                self.connections.append(conn)
+                self.accepted += 1
+
+    def _read_loop(self):
+        """Apply batches as they arrive; on close, drain until workers go quiet."""
+        while not self._stop_reading.is_set():
+            self._poll(0.05)
+        while True:
+            accepted = self.accepted
+            if not self._poll(CLOSE_GRACE) and accepted == self.accepted:
+                break
+
+    def _poll(self, timeout: float) -> bool:
+        """Apply every batch that is ready. Returns whether anything was read."""
+        with self._lock:
+            connections = list(self.connections)
+        if not connections:
+            time.sleep(timeout)
+            return False
+        ready = wait(connections, timeout=timeout)
+        for conn in ready:
+            try:
+                self._apply(conn.recv())
+            except (OSError, EOFError):
+                # Worker went away - forget its connection
+                with self._lock:
+                    self.connections.remove(conn)
+                conn.close()
+        return bool(ready)
+
+    def _apply(self, batch: Tuple[List[Tuple[Optional[int], str]], int]):
+        """Replay one batch onto the tracker."""
+        steps, tokens = batch
+        for step_num, description in steps:
+            self.tracker.step(step_num, description)
+        # Kept apart from the parent's own count so update_tokens() there can't erase it.
+        # Only this thread writes worker_tokens
+        self.tracker.worker_tokens += tokens
+
+
+# One connection per worker process and hub address, shared by every proxy
+_connections: Dict[Tuple[int, object], Tuple[object, threading.Lock]] = {}
+_connections_lock = threading.Lock()
+_live_proxies = weakref.WeakSet()
+_exit_hook_pid = None
+
+
+def _flush_live_proxies():
+    """Send whatever is still buffered before the worker process exits."""
+    for proxy in list(_live_proxies):
+        proxy.flush()
+
+
+def _register_exit_hook():
+    global _exit_hook_pid
+    if _exit_hook_pid != os.getpid():
+        _exit_hook_pid = os.getpid()
+        # Pool workers leave through multiprocessing's exit path, not atexit
+        util.Finalize(None, _flush_live_proxies, exitpriority=10)
+
+
+class TrackerProxy:
+    """
+    Picklable stand-in for an AgentWrapper inside worker processes.
+
+    Step updates are sent straight away. Tokens are reported as increments,
+    since a pool may hand one unpickled proxy to several tasks, and are summed
+    and sent at most once per flush_interval, with the next step, on flush(),
+    and when the proxy is garbage-collected - so, like AgentWrapper, it needs
+    no teardown.
+    """
+
+    def __init__(self, address, authkey: bytes, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.address = address
+        self.authkey = bytes(authkey)
+        self.flush_interval = flush_interval
+        self._reset()
+
+    def _reset(self):
+        self.pending_steps: List[Tuple[Optional[int], str]] = []
+        self.pending_tokens = 0
+        self.last_flush = time.monotonic()
+        self.is_closed = False
+        self._lock = threading.Lock()
+        _live_proxies.add(self)
+
+    def __getstate__(self):
+        return {
+            "address": self.address,
+            "authkey": self.authkey,
+            "flush_interval": self.flush_interval,
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def __del__(self):
+        # Pool workers drop the unpickled proxy when the task returns
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def update_step(self, step: Optional[int] = None, description: str = ""):
+        """Update current step on the parent's tracker."""
+        with self._lock:
+            self.pending_steps.append((step, description))
+        # Steps are rare and drive the display, so don't hold them back
+        self.flush()
+
+    def add_tokens(self, tokens: int):
+        """Add tokens used since the last call to the parent's count."""
+        with self._lock:
+            self.pending_tokens += tokens
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Send buffered updates to the parent now."""
+        with self._lock:
+            self.last_flush = time.monotonic()
+            if self.is_closed or (not self.pending_steps and not self.pending_tokens):
+                return
+            batch = (self.pending_steps, self.pending_tokens)
+            self.pending_steps = []
+            self.pending_tokens = 0
+        self._send(batch)
+
+    def _send(self, batch):
+        key = (os.getpid(), self.address)
+        try:
+            with _connections_lock:
+                entry = _connections.get(key)
+                if entry is None:
+                    _register_exit_hook()
+                    entry = (Client(self.address, authkey=self.authkey), threading.Lock())
+                    _connections[key] = entry
+            conn, conn_lock = entry
+            with conn_lock:
+                conn.send(batch)
+        except (OSError, EOFError, ValueError):
+            # Parent tracker has stopped - tracking must never break the agent
+            self.is_closed = True
+            with _connections_lock:
+                _connections.pop(key, None)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of metrics instrumentation against the tracker's own work.
+A tick is one emit plus a burst of token updates - roughly what a tracker does
+per 500ms update interval. Metrics work is mostly per step change, so overhead
+is reported for several step rates, from a step every 2s to none at all. Output goes to
+a sink that discards it and CPU time is measured, so write syscalls and other
+processes add little noise; leaving out the syscalls also makes the tracker's
+cost smaller, which makes the reported overhead a conservative upper figure. Both sides run
+the real AgentETATracker; the baseline uses NullTrackerMetrics, which turns the
+bookkeeping off. An A/A run of the baseline against itself shows the noise floor.
+Usage: python bench_metrics.py [ticks] [rounds]
+"""
+
+import sys
+import time
+
+from agent_with_eta import AgentETATracker
+from metrics import MetricsRegistry, NullTrackerMetrics, TrackerMetrics
+
+
+class NullSink:
+    """Stand-in for stdout/stderr that drops everything."""
+    
+    def write(self, text):
+        return len(text)
+        
+    def flush(self):
+        pass
+
+
+STEP_RATES = (4, 20, 120)  # Ticks per step: a step every 2s, 10s and 60s
+
+
+def run(metrics, ticks: int, ticks_per_step: int, tokens_per_tick: int = 20) -> float:
+    """Time steps, token updates and emits on one tracker, in seconds."""
+    tracker = AgentETATracker(total_steps=ticks, expected_duration=60.0, metrics=metrics)
+    # Mirror start() without the background thread so only this loop emits
+    tracker.start_time = tracker._step_started = time.time()
+    tracker.is_running = True
+    tracker.current_step = 1
+    metrics.tracker_started(tracker)
+    
+    tokens = 0
+    begin = time.process_time()
+    for i in range(1, ticks + 1):
+        if i % ticks_per_step == 0:
+            tracker.step(description=f"Step {i % 8}")
+        for _ in range(tokens_per_tick):
+            tokens += 1
+            tracker.update_tokens(tokens)
+        tracker._emit_update()
+    tracker.is_running = False
+    metrics.tracker_stopped(tracker, time.time() - tracker.start_time)
+    return time.process_time() - begin
+
+
+def compare(make_a, make_b, ticks: int, ticks_per_step: int, rounds: int) -> float:
+    """
+    Median relative cost of b over a. Each round times a and b back to back
+    (alternating which goes first), so slow drift in machine speed cancels out
+    of the per-round ratio.
+    """
+    ratios = []
+    for i in range(rounds):
+        pair = [make_a, make_b] if i % 2 else [make_b, make_a]
+        times = {make: run(make(), ticks, ticks_per_step) for make in pair}
+        ratios.append(times[make_b] / times[make_a])
+    ratios.sort()
+    return ratios[len(ratios) // 2] - 1
+
+
+def time_scrape(steps: int = 8) -> float:
+    """Time one exposition of a registry holding a finished run, in seconds."""
+    registry = MetricsRegistry()
+    metrics = TrackerMetrics(registry)
+    tracker = AgentETATracker(total_steps=steps, model="bench", metrics=metrics)
+    tracker.start_time = tracker._step_started = time.time()
+    tracker.is_running = True
+    metrics.tracker_started(tracker)
+    for i in range(1, steps + 1):
+        tracker.step(i, f"Step {i}")
+    tracker.update_tokens(1000)
+    tracker.is_running = False
+    metrics.tracker_stopped(tracker, 1.0)
+    
+    rounds = 200
+    begin = time.perf_counter()
+    for _ in range(rounds):
+        registry.exposition()
+    return (time.perf_counter() - begin) / rounds
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 101
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = NullSink()
+    try:
+        tick = min(run(NullTrackerMetrics(), ticks, ticks) for _ in range(5)) / ticks
+        overheads = [
+            (rate, compare(NullTrackerMetrics, lambda: TrackerMetrics(MetricsRegistry()),
+                           ticks, rate, rounds))
+            for rate in STEP_RATES + (ticks + 1,)
+        ]
+        # Both sides identical - shows how far apart equal code measures here
+        noise = compare(NullTrackerMetrics, lambda: NullTrackerMetrics(),
+                        ticks, STEP_RATES[0], rounds)
+    finally:
+        sys.stdout, sys.stderr = real_stdout, real_stderr
+    
+    print(f"tracker tick:   {tick * 1e6:.2f} us (metrics off)")
+    for rate, overhead in overheads:
+        label = f"step every {rate} ticks" if rate <= ticks else "no steps"
+        print(f"overhead:       {overhead * 100:+.2f}% ({label})")
+    print(f"A/A noise:      {noise * 100:+.2f}%")
+    # Scrapes run on the HTTP thread, once per scrape interval, not per tick
+    print(f"scrape:         {time_scrape() * 1e6:.0f} us/exposition")
+
+
+if __name__ == "__main__":
+    main()
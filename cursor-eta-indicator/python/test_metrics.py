@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the tracker metrics registry.
+"""
+
+import gc
+import unittest
+import urllib.request
+from io import StringIO
+from unittest.mock import patch
+
+from agent_with_eta import AgentETATracker, AgentWrapper
+from metrics import (MAX_STEP_LABELS, MetricsRegistry, NullTrackerMetrics, TrackerMetrics,
+                     start_http_server)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test counters, gauges, histograms and exposition."""
+    
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        
+    def test_counter_and_gauge(self):
+        """Test basic value metrics."""
+        counter = self.registry.counter("jobs_total", "Jobs.")
+        counter.inc()
+        counter.inc(2)
+        self.assertEqual(counter.get(), 3)
+        self.assertRaises(ValueError, counter.inc, -1)
+        
+        gauge = self.registry.gauge("active", "Active.")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertEqual(gauge.get(), 1)
+        
+        # Same name returns the same family
+        self.assertIs(self.registry.counter("jobs_total", "Jobs."), counter)
+        
+    def test_histogram_buckets(self):
+        """Test fixed buckets are upper-inclusive and cumulative."""
+        hist = self.registry.histogram("latency_seconds", "Latency.", buckets=(1, 5))
+        for value in (0.5, 1.0, 3.0, 10.0):
+            hist.observe(value)
+            
+        text = self.registry.exposition()
+        self.assertIn('latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="5"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("latency_seconds_sum 14.5", text)
+        self.assertIn("latency_seconds_count 4", text)
+        
+    def test_labels(self):
+        """Test labelled children and label escaping."""
+        counter = self.registry.counter("tokens_total", "Tokens.", ["model"])
+        counter.labels('gpt "4"').inc(10)
+        self.assertRaises(ValueError, counter.inc)
+        self.assertRaises(ValueError, counter.labels, "a", "b")
+        
+        text = self.registry.exposition()
+        self.assertIn("# TYPE tokens_total counter", text)
+        self.assertIn('tokens_total{model="gpt \\"4\\""} 10', text)
+        
+    def test_http_endpoint(self):
+        """Test the exposition endpoint serves the registry."""
+        self.registry.counter("served_total", "Served.").inc()
+        server = start_http_server(port=0, registry=self.registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=2) as response:
+                body = response.read().decode("utf-8")
+                content_type = response.headers["Content-Type"]
+        finally:
+            server.shutdown()
+            server.server_close()
+            
+        self.assertIn("served_total 1", body)
+        self.assertTrue(content_type.startswith("text/plain"))
+
+
+class TestTrackerMetrics(unittest.TestCase):
+    """Test the tracker and wrapper hooks."""
+    
+    def setUp(self):
+        self.metrics = TrackerMetrics(MetricsRegistry())
+        
+    def test_tracker_lifecycle(self):
+        """Test active gauge, step durations and completion metrics."""
+        tracker = AgentETATracker(total_steps=2, expected_duration=1.0,
+                                  model="test-model", metrics=self.metrics)
+        with patch('sys.stdout', new_callable=StringIO), \
+             patch('sys.stderr', new_callable=StringIO):
+            tracker.start()
+            self.assertEqual(self.metrics.active_trackers.get(), 1)
+            tracker.step(1, "Parsing")
+            tracker.step(2, "Generating")
+            tracker.update_tokens(50)
+            tracker.stop()
+            tracker.stop()  # Second stop must not double count
+            
+        self.assertEqual(self.metrics.active_trackers.get(), 0)
+        self.assertGreaterEqual(self.metrics.emits.get(), 1)
+        self.assertEqual(self.metrics.run_duration.get(), 1)
+        # Only the change to step 2 predicts anything; start has no elapsed time
+        self.assertEqual(self.metrics.estimate_error.get(), 1)
+        self.assertEqual(self.metrics.step_duration.labels("Generating").get(), 1)
+        self.assertEqual(self.metrics.tokens.labels("test-model").get(), 50)
+        self.assertEqual(self.metrics.tokens_per_second.labels("test-model").get(), 1)
+        
+    def test_suppressed_emit(self):
+        """Test a failing output stream is counted, not raised."""
+        tracker = AgentETATracker(metrics=self.metrics)
+        with patch('sys.stderr', new_callable=StringIO) as mock_stderr:
+            mock_stderr.close()
+            tracker._emit_update()
+            
+        self.assertEqual(tracker.suppressed_count, 1)
+        self.assertEqual(tracker.emit_count, 0)
+        
+    def test_scrape_drains_live_trackers(self):
+        """Test live tracker counts reach the registry without stopping."""
+        tracker = AgentETATracker(metrics=self.metrics)
+        tracker.start_time = tracker._step_started = 0.0
+        tracker.is_running = True
+        self.metrics.tracker_started(tracker)
+        tracker.emit_count = 3
+        tracker.step(2, "Planning")
+        
+        text = self.metrics.registry.exposition()
+        self.assertIn("cursor_eta_emits_total 3", text)
+        self.assertIn('cursor_eta_step_duration_seconds_count{step="unlabeled"} 1', text)
+        
+        # Only the delta is added on the next drain
+        tracker.emit_count = 5
+        self.metrics.sync()
+        self.assertEqual(self.metrics.emits.get(), 5)
+        self.assertEqual(list(tracker.pending_steps), [])
+        
+    def test_estimate_error_per_step(self):
+        """Test estimator error compares each step's prediction with the actual duration."""
+        tracker = AgentETATracker(total_steps=4, metrics=self.metrics)
+        tracker.start_time = tracker._step_started = 0.0
+        tracker.is_running = True
+        tracker.eta_checkpoints = [(1, 0.0), (2, 5.0)]
+        self.metrics.tracker_started(tracker)
+        tracker.is_running = False
+        self.metrics.tracker_stopped(tracker, 10.0)
+        
+        # Step 1 at 0s is skipped; step 2 at 5s predicts 10s (error 0)
+        text = self.metrics.registry.exposition()
+        self.assertIn("cursor_eta_estimate_error_ratio_count 1", text)
+        self.assertIn("cursor_eta_estimate_error_ratio_sum 0", text)
+        self.assertIn('cursor_eta_estimate_error_ratio_bucket{le="0.05"} 1', text)
+        
+    def test_step_label_cap(self):
+        """Test free-form step descriptions can't grow the label set without bound."""
+        tracker = AgentETATracker(total_steps=1000, metrics=self.metrics)
+        tracker.start_time = tracker._step_started = 0.0
+        tracker.is_running = True
+        self.metrics.tracker_started(tracker)
+        for i in range(1, MAX_STEP_LABELS + 20):
+            tracker.step(i, f"Processing step {i}")
+        self.metrics.sync()
+        
+        self.assertEqual(len(self.metrics.step_duration._children), MAX_STEP_LABELS + 1)
+        self.assertEqual(self.metrics.step_duration.labels("other").get(), 19)
+        
+    def test_start_is_idempotent(self):
+        """Test repeated starts count once and dropped trackers leave the gauge."""
+        tracker = AgentETATracker(metrics=self.metrics)
+        self.metrics.tracker_started(tracker)
+        self.metrics.tracker_started(tracker)
+        self.assertEqual(self.metrics.active_trackers.get(), 1)
+        
+        del tracker
+        gc.collect()
+        self.metrics.sync()
+        self.assertEqual(self.metrics.active_trackers.get(), 0)
+        
+    def test_restart_counts_each_run_once(self):
+        """Test a restarted tracker doesn't report the first run's emits again."""
+        tracker = AgentETATracker(metrics=self.metrics)
+        with patch('sys.stdout', new_callable=StringIO), \
+             patch('sys.stderr', new_callable=StringIO), \
+             patch.object(AgentETATracker, '_update_loop'):
+            for _ in range(2):
+                tracker.start()
+                tracker._emit_update()
+                tracker._emit_update()
+                tracker.stop()
+                
+        self.assertEqual(self.metrics.emits.get(), 4)
+        
+    def test_null_metrics_skip_bookkeeping(self):
+        """Test NullTrackerMetrics leaves nothing queued on the tracker."""
+        tracker = AgentETATracker(metrics=NullTrackerMetrics())
+        with patch('sys.stdout', new_callable=StringIO), \
+             patch('sys.stderr', new_callable=StringIO):
+            tracker.start()
+            tracker.step(2, "Planning")
+            tracker._emit_update()
+            tracker.stop()
+            
+        self.assertEqual(tracker.emit_count, 0)
+        self.assertEqual(list(tracker.pending_steps), [])
+        self.assertEqual(tracker.eta_checkpoints, [])
+        
+    def test_wrapper_outcome(self):
+        """Test the wrapper records run outcomes."""
+        wrapper = AgentWrapper(metrics=self.metrics)
+        
+        def failing_task():
+            raise RuntimeError("boom")
+            
+        with patch('sys.stdout', new_callable=StringIO):
+            self.assertRaises(RuntimeError, wrapper.execute_with_eta, failing_task)
+            
+        self.assertEqual(self.metrics.runs.labels("error").get(), 1)
+        self.assertEqual(self.metrics.active_trackers.get(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
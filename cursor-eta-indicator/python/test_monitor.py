@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the STATUS| stream monitor.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from monitor import StatusAggregator, StreamReader, iter_payloads, main, render_dashboard, scan
+
+
+def status_line(step, elapsed, total=3, description=""):
+    """Build a STATUS| line like AgentETATracker emits."""
+    status = {
+        "eta_seconds": 10, "current_step": step, "total_steps": total,
+        "tokens_used": elapsed * 10, "tokens_expected": 0, "elapsed_seconds": elapsed,
+        "progress_percent": round(step / total * 100), "current_description": description,
+    }
+    return f"STATUS|{json.dumps(status)}\n"
+
+
+class TestParsing(unittest.TestCase):
+    """Test payload extraction and run aggregation."""
+    
+    def test_iter_payloads(self):
+        """Test noise is skipped and partial lines are left unconsumed."""
+        buf = (b"compiling...\n"
+               b"\rETA: 5s | Step 1/3 [..] 33%STATUS|{\"a\": 1}\r\n"
+               b"STATUS|COMPLETE\n"
+               b"STATUS|{\"partial")
+        payloads = list(iter_payloads(buf))
+        
+        self.assertEqual([p for p, _ in payloads], [b'{"a": 1}', b"COMPLETE"])
+        self.assertEqual(buf[payloads[-1][1]:], b'STATUS|{"partial')
+        
+    def test_run_splitting(self):
+        """Test runs split on COMPLETE and on elapsed time going backwards."""
+        aggregator = StatusAggregator()
+        lines = (status_line(1, 0, description="Parsing") + status_line(2, 4) +
+                 "STATUS|COMPLETE\n" +
+                 status_line(1, 0) + status_line(2, 3) +
+                 status_line(1, 0) +  # Restarted without COMPLETE
+                 "STATUS|{not json\n")
+        aggregator.feed_buffer("log", lines.encode())
+        
+        self.assertEqual(len(aggregator.runs), 3)
+        self.assertEqual([run.completed for run in aggregator.runs], [True, False, False])
+        self.assertEqual([run.index for run in aggregator.runs], [1, 2, 3])
+        self.assertEqual(aggregator.current["log"], [aggregator.runs[2]])
+        self.assertEqual(aggregator.malformed, 1)
+        self.assertEqual(aggregator.runs[0].step_durations(), [(1, "Parsing", 4), (2, "", 0)])
+        
+        dashboard = render_dashboard(aggregator)
+        self.assertIn("done", dashboard)
+        self.assertIn("lost", dashboard)
+        self.assertIn("running", dashboard)
+        
+    def test_interleaved_trackers(self):
+        """Test two trackers writing to one source stay two runs."""
+        aggregator = StatusAggregator()
+        lines = "".join(status_line(step, step * 2, total=3) + status_line(step, step * 3, total=5)
+                        for step in range(1, 4))
+        aggregator.feed_buffer("log", lines.encode())
+        
+        self.assertEqual(len(aggregator.runs), 2)
+        self.assertEqual([run.updates for run in aggregator.runs], [3, 3])
+        self.assertEqual([run.elapsed for run in aggregator.runs], [6, 9])
+        
+    def test_interleaved_live_trackers_with_same_totals(self):
+        """Test trackers read live are told apart by start time."""
+        aggregator = StatusAggregator()
+        for second in range(20, 30):
+            # One tracker started at t=0, the other at t=10
+            aggregator.feed_buffer("pipe", status_line(1, second).encode(), arrival=1000.0 + second)
+            aggregator.feed_buffer("pipe", status_line(1, second - 10).encode(), arrival=1000.0 + second)
+            
+        self.assertEqual(len(aggregator.runs), 2)
+        self.assertEqual([run.elapsed for run in aggregator.runs], [29, 19])
+        
+    def test_keep_runs(self):
+        """Test only the newest finished runs are kept when bounded."""
+        aggregator = StatusAggregator(keep_runs=2)
+        lines = (status_line(1, 1) + "STATUS|COMPLETE\n") * 5 + status_line(1, 1)
+        aggregator.feed_buffer("log", lines.encode())
+        
+        self.assertEqual([run.index for run in aggregator.runs], [4, 5, 6])
+        self.assertTrue(aggregator.runs[-1].is_live)
+
+
+class TestReaders(unittest.TestCase):
+    """Test one-pass scans and incremental tailing."""
+    
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".log")
+        os.close(handle)
+        
+    def tearDown(self):
+        os.unlink(self.path)
+        
+    def test_scan_without_trailing_newline(self):
+        """Test a mapped scan picks up a final unterminated line."""
+        with open(self.path, "w") as f:
+            f.write("noise\n" + status_line(1, 0) + status_line(3, 7).rstrip("\n"))
+            
+        aggregator = StatusAggregator()
+        scan(self.path, aggregator)
+        self.assertEqual(len(aggregator.runs), 1)
+        self.assertEqual(aggregator.runs[0].last["current_step"], 3)
+        
+    def test_tail_partial_writes(self):
+        """Test lines split across writes are parsed once complete."""
+        aggregator = StatusAggregator()
+        reader = StreamReader(self.path)
+        line = status_line(2, 5)
+        try:
+            with open(self.path, "a") as f:
+                f.write("noise\n" + line[:20])
+                f.flush()
+                self.assertTrue(reader.read_into(aggregator))
+                self.assertEqual(aggregator.runs, [])
+                
+                f.write(line[20:] + "STATUS|COMPLETE\n")
+                f.flush()
+                reader.read_into(aggregator)
+        finally:
+            reader.close()
+            
+        self.assertEqual(len(aggregator.runs), 1)
+        self.assertTrue(aggregator.runs[0].completed)
+        
+    def test_summary_json(self):
+        """Test the --summary --json entry point."""
+        with open(self.path, "w") as f:
+            f.write(status_line(1, 0, description="Plan") + status_line(2, 2) + "STATUS|COMPLETE\n")
+            
+        with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            self.assertEqual(main(["--summary", "--json", self.path]), 0)
+            
+        summary = json.loads(mock_stdout.getvalue())
+        self.assertTrue(summary["completed"])
+        self.assertEqual(summary["elapsed_seconds"], 2)
+        self.assertEqual(summary["steps"][0], {"step": 1, "description": "Plan", "seconds": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
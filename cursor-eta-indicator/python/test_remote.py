@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Unit tests for cross-process tracker proxies.
+"""
+
+import pickle
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from unittest.mock import patch
+
+from agent_with_eta import AgentETATracker, AgentWrapper
+from metrics import MetricsRegistry, TrackerMetrics
+
+
+def worker_task(proxy, worker_id, tokens):
+    """Report a step and a burst of token updates from a worker process."""
+    with proxy:
+        proxy.update_step(description=f"Worker {worker_id}")
+        for _ in range(tokens):
+            proxy.add_tokens(1)
+    return worker_id
+
+
+def bare_worker_task(proxy, tokens):
+    """Report tokens the way AgentWrapper is used - no with, no flush()."""
+    for _ in range(tokens):
+        proxy.add_tokens(1)
+    return tokens
+
+
+def slow_worker_task(proxy, seconds):
+    """Report a step, then work for a while without touching the proxy."""
+    proxy.update_step(description="Long computation")
+    time.sleep(seconds)
+    return seconds
+
+
+class TestTrackerProxy(unittest.TestCase):
+    """Test proxy batching and delivery to the parent tracker."""
+    
+    def setUp(self):
+        self.tracker = AgentETATracker(total_steps=10, metrics=TrackerMetrics(MetricsRegistry()))
+        self.stdout = patch('sys.stdout', new_callable=StringIO)
+        self.stderr = patch('sys.stderr', new_callable=StringIO)
+        self.stdout.start()
+        self.stderr.start()
+        self.tracker.start()
+        
+    def tearDown(self):
+        self.tracker.stop()
+        self.stdout.stop()
+        self.stderr.stop()
+        
+    def test_pickle_resets_buffers(self):
+        """Test a pickled proxy carries the address but not pending updates."""
+        proxy = self.tracker.proxy(flush_interval=60)
+        proxy.add_tokens(5)
+        
+        clone = pickle.loads(pickle.dumps(proxy))
+        self.assertEqual(clone.address, proxy.address)
+        self.assertEqual(clone.flush_interval, 60)
+        self.assertEqual(clone.pending_tokens, 0)
+        
+    def test_updates_are_batched(self):
+        """Test token updates are coalesced until the next step is sent."""
+        proxy = self.tracker.proxy(flush_interval=60)
+        for _ in range(1000):
+            proxy.add_tokens(1)
+        
+        self.assertEqual(self.tracker.tokens_used, 0)
+        self.assertEqual(proxy.pending_tokens, 1000)
+        
+        proxy.update_step(4, "Remote step")
+        self.assertEqual(proxy.pending_tokens, 0)  # Sent along with the step
+        
+        self.tracker.stop()
+        self.assertEqual(self.tracker.tokens_used, 1000)
+        self.assertEqual(self.tracker.current_step, 4)
+        self.assertEqual(self.tracker.step_descriptions[4], "Remote step")
+        
+    def test_process_pool(self):
+        """Test updates from many worker processes land in the parent."""
+        proxy = self.tracker.proxy()
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(worker_task, [proxy] * 6, range(6), [2000] * 6))
+            
+        self.tracker.stop()
+        self.assertEqual(results, list(range(6)))
+        self.assertEqual(self.tracker.tokens_used, 6 * 2000)
+        self.assertEqual(self.tracker.current_step, 7)
+        self.assertEqual(len(self.tracker.step_descriptions), 6)
+        
+    def test_workers_without_with(self):
+        """Test buffered tokens are sent when a worker's proxy is dropped."""
+        proxy = self.tracker.proxy(flush_interval=60)
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            list(executor.map(bare_worker_task, [proxy] * 6, [500] * 6))
+            
+        self.tracker.stop()
+        self.assertEqual(self.tracker.tokens_used, 3000)
+        
+    def test_chunked_tasks_share_a_proxy(self):
+        """Test tasks sent in one chunk, which share one unpickled proxy, all count."""
+        proxy = self.tracker.proxy(flush_interval=60)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            list(executor.map(bare_worker_task, [proxy] * 6, [500] * 6, chunksize=3))
+            
+        self.tracker.stop()
+        self.assertEqual(self.tracker.tokens_used, 3000)
+        
+    def test_stop_right_after_task(self):
+        """Test a worker's first send, made as its task returns, isn't refused by stop()."""
+        proxy = self.tracker.proxy(flush_interval=60)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            executor.submit(bare_worker_task, proxy, 500).result()
+            self.tracker.stop()
+            
+        self.assertEqual(self.tracker.tokens_used, 500)
+        
+    def test_step_is_live(self):
+        """Test a step reaches the parent while the worker is still busy."""
+        proxy = self.tracker.proxy(flush_interval=60)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(slow_worker_task, proxy, 2.0)
+            deadline = time.time() + 1.5
+            while not self.tracker.step_descriptions and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertFalse(future.done())
+            self.assertEqual(self.tracker.step_descriptions, {2: "Long computation"})
+            future.result()
+            
+    def test_parent_and_worker_tokens(self):
+        """Test the parent's own update_tokens doesn't erase worker totals."""
+        proxy = self.tracker.proxy()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            list(executor.map(bare_worker_task, [proxy] * 2, [100] * 2))
+        self.tracker.update_tokens(50)
+        
+        self.tracker.stop()
+        self.assertEqual(self.tracker.local_tokens, 50)
+        self.assertEqual(self.tracker.worker_tokens, 200)
+        self.assertEqual(self.tracker.tokens_used, 250)
+        self.assertEqual(self.tracker.get_status()["tokens_used"], 250)
+        
+    def test_stopped_tracker(self):
+        """Test a proxy outliving its tracker drops updates quietly."""
+        proxy = self.tracker.proxy()
+        self.tracker.stop()
+        
+        proxy.add_tokens(10)
+        proxy.flush()
+        self.assertTrue(proxy.is_closed)
+        self.assertEqual(self.tracker.tokens_used, 0)
+        
+        # No new listener for a tracker that has stopped
+        self.assertIsNone(self.tracker.proxy())
+        self.assertIsNone(self.tracker.hub)
+
+
+class TestWrapperProxy(unittest.TestCase):
+    """Test proxies obtained through AgentWrapper."""
+    
+    def test_wrapper_proxy(self):
+        """Test the wrapper hands out a proxy only while tracking."""
+        wrapper = AgentWrapper(metrics=TrackerMetrics(MetricsRegistry()))
+        self.assertIsNone(wrapper.proxy())
+        
+        def task():
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                list(executor.map(worker_task, [wrapper.proxy()] * 2, range(2), [50] * 2))
+            return "Done"
+            
+        with patch('sys.stdout', new_callable=StringIO):
+            result = wrapper.execute_with_eta(task, eta_total_steps=3)
+            
+        self.assertEqual(result, "Done")
+        self.assertEqual(wrapper.tracker.tokens_used, 100)
+        self.assertIsNone(wrapper.proxy())
+
+
+if __name__ == "__main__":
+    unittest.main()